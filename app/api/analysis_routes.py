@@ -1,25 +1,72 @@
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException, BackgroundTasks
-from fastapi.responses import JSONResponse
+import asyncio
+from collections import OrderedDict
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException
+from fastapi.responses import ORJSONResponse
 import logging
-from typing import Dict, Any
+from typing import Dict, Any, List, Tuple
 
 from app.core.code_analyzer import CodeAnalyzer
 from app.schemas.schemas import AnalysisReport, FullReport
-from app.utils.file_utils import (
-    extract_zip_file, 
-    save_uploaded_file, 
-    create_temp_directory, 
-    cleanup_temp_directory,
-    validate_file_extension
-)
+from app.utils.file_utils import compute_file_sha256, validate_file_extension
 
 logger = logging.getLogger(__name__)
 router = APIRouter()
 
+# 最近分析结果的缓存数量
+ANALYSIS_CACHE_SIZE = 16
+# (ZIP内容的 SHA-256, 需求描述) -> (功能分析结果, 执行计划建议, 功能验证信息)，按最近使用顺序排列；
+# 只缓存报告数据，分析器及其函数定义表在请求结束后即可释放
+_analysis_cache: "OrderedDict[Tuple[str, str], Tuple[List[Dict[str, Any]], str, Dict[str, Any]]]" = OrderedDict()
+
+
+async def _prepare_analysis(
+    problem_description: str, code_zip: UploadFile
+) -> Tuple[List[Dict[str, Any]], str, Dict[str, Any]]:
+    """
+    校验上传文件并完成基本分析，两个分析端点共用；相同ZIP内容和需求描述的请求直接复用最近的分析结果
+    
+    Args:
+        problem_description: 项目功能需求描述
+        code_zip: 上传的ZIP文件
+    
+    Returns:
+        (功能分析结果, 执行计划建议, 功能验证信息)
+    
+    Raises:
+        HTTPException: 如果上传的不是ZIP文件
+        zipfile.BadZipFile: 如果ZIP文件无效
+    """
+    # 验证上传文件类型
+    if not validate_file_extension(code_zip.filename, ['zip']):
+        raise HTTPException(status_code=400, detail="只支持上传ZIP格式的文件")
+    
+    # 读取、哈希与分析都是阻塞操作，放到线程中执行以免阻塞事件循环
+    cache_key = (await asyncio.to_thread(compute_file_sha256, code_zip.file), problem_description)
+    cached = _analysis_cache.get(cache_key)
+    if cached is not None:
+        _analysis_cache.move_to_end(cache_key)
+        logger.info("相同的代码和需求描述已分析过，直接使用缓存的分析结果")
+        return cached
+    
+    # 直接从上传的ZIP文件中读取源代码，无需保存和解压到磁盘
+    analyzer = await asyncio.to_thread(CodeAnalyzer.from_zip, code_zip.file, problem_description)
+    feature_analysis = await asyncio.to_thread(analyzer.analyze_features)
+    execution_plan = analyzer.suggest_execution_plan()
+    # 验证信息只依赖项目类型，与基本分析一起生成，缓存命中时无需保留分析器
+    functional_verification = {
+        "generated_test_code": analyzer.generate_test_code(),
+        "execution_result": analyzer.verify_functionality()
+    }
+    
+    result = (feature_analysis, execution_plan, functional_verification)
+    _analysis_cache[cache_key] = result
+    if len(_analysis_cache) > ANALYSIS_CACHE_SIZE:
+        _analysis_cache.popitem(last=False)
+    return result
+
 
 @router.post("/analyze", response_model=AnalysisReport, tags=["分析"])
 async def analyze_code(
-    background_tasks: BackgroundTasks,
     problem_description: str = Form(..., description="项目功能需求描述"),
     code_zip: UploadFile = File(..., description="包含完整源代码的ZIP文件")
 ):
@@ -29,35 +76,9 @@ async def analyze_code(
     - **problem_description**: 项目功能需求的自然语言描述
     - **code_zip**: 包含完整项目源代码的ZIP压缩文件
     """
-    # 验证上传文件类型
-    if not validate_file_extension(code_zip.filename, ['zip']):
-        raise HTTPException(status_code=400, detail="只支持上传ZIP格式的文件")
-    
-    # 创建临时目录
-    temp_dir = create_temp_directory()
-    # 确保在请求完成后清理临时目录
-    background_tasks.add_task(cleanup_temp_directory, temp_dir)
-    
-    # 保存上传的ZIP文件
-    zip_path = f"{temp_dir}/{code_zip.filename}"
-    save_uploaded_file(code_zip.file, zip_path)
-    
-    # 解压文件
-    extract_dir = f"{temp_dir}/extracted"
-    try:
-        extract_zip_file(zip_path, extract_dir)
-    except zipfile.BadZipFile:
-        raise HTTPException(status_code=400, detail="无效的ZIP文件")
-    except Exception as e:
-        logger.error(f"解压文件时发生错误: {e}")
-        raise HTTPException(status_code=500, detail="处理ZIP文件时发生错误")
-    
-    # 分析代码
     try:
         logger.info(f"开始分析代码，需求描述: {problem_description[:50]}...")
-        analyzer = CodeAnalyzer(extract_dir, problem_description)
-        feature_analysis = analyzer.analyze_features()
-        execution_plan = analyzer.suggest_execution_plan()
+        feature_analysis, execution_plan, _ = await _prepare_analysis(problem_description, code_zip)
         
         # 构建报告
         report = {
@@ -66,8 +87,12 @@ async def analyze_code(
         }
         
         logger.info("代码分析完成，生成报告成功")
-        return JSONResponse(content=report)
+        return ORJSONResponse(content=report)
         
+    except HTTPException:
+        raise
+    except zipfile.BadZipFile:
+        raise HTTPException(status_code=400, detail="无效的ZIP文件")
     except Exception as e:
         logger.error(f"分析代码时发生错误: {e}")
         raise HTTPException(status_code=500, detail="分析代码时发生错误")
@@ -75,7 +100,6 @@ async def analyze_code(
 
 @router.post("/analyze-with-verification", response_model=FullReport, tags=["分析"])
 async def analyze_with_verification(
-    background_tasks: BackgroundTasks,
     problem_description: str = Form(..., description="项目功能需求描述"),
     code_zip: UploadFile = File(..., description="包含完整源代码的ZIP文件")
 ):
@@ -85,58 +109,26 @@ async def analyze_with_verification(
     - **problem_description**: 项目功能需求的自然语言描述
     - **code_zip**: 包含完整项目源代码的ZIP压缩文件
     """
-    # 首先执行基本分析
-    # 注意：这里我们不能直接调用上面的函数，因为FastAPI不允许在路由处理函数中调用另一个路由处理函数
-    # 我们需要重新实现相似的逻辑，但添加验证部分
-    
-    # 验证上传文件类型
-    if not validate_file_extension(code_zip.filename, ['zip']):
-        raise HTTPException(status_code=400, detail="只支持上传ZIP格式的文件")
-    
-    # 创建临时目录
-    temp_dir = create_temp_directory()
-    background_tasks.add_task(cleanup_temp_directory, temp_dir)
-    
-    # 保存上传的ZIP文件
-    zip_path = f"{temp_dir}/{code_zip.filename}"
-    save_uploaded_file(code_zip.file, zip_path)
-    
-    # 解压文件
-    extract_dir = f"{temp_dir}/extracted"
-    try:
-        extract_zip_file(zip_path, extract_dir)
-    except zipfile.BadZipFile:
-        raise HTTPException(status_code=400, detail="无效的ZIP文件")
-    except Exception as e:
-        logger.error(f"解压文件时发生错误: {e}")
-        raise HTTPException(status_code=500, detail="处理ZIP文件时发生错误")
-    
-    # 分析代码并生成验证结果
     try:
         logger.info(f"开始分析代码并进行功能验证，需求描述: {problem_description[:50]}...")
-        analyzer = CodeAnalyzer(extract_dir, problem_description)
-        
-        # 基本分析
-        feature_analysis = analyzer.analyze_features()
-        execution_plan = analyzer.suggest_execution_plan()
-        
-        # 生成验证信息
-        generated_test_code = analyzer.generate_test_code()
-        execution_result = analyzer.verify_functionality()
+        feature_analysis, execution_plan, functional_verification = await _prepare_analysis(
+            problem_description, code_zip
+        )
         
         # 构建完整报告
         report = {
             "feature_analysis": feature_analysis,
             "execution_plan_suggestion": execution_plan,
-            "functional_verification": {
-                "generated_test_code": generated_test_code,
-                "execution_result": execution_result
-            }
+            "functional_verification": functional_verification
         }
         
         logger.info("代码分析和功能验证完成，生成完整报告成功")
-        return JSONResponse(content=report)
+        return ORJSONResponse(content=report)
         
+    except HTTPException:
+        raise
+    except zipfile.BadZipFile:
+        raise HTTPException(status_code=400, detail="无效的ZIP文件")
     except Exception as e:
         logger.error(f"分析代码或执行验证时发生错误: {e}")
         raise HTTPException(status_code=500, detail="分析代码或执行验证时发生错误")
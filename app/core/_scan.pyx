@@ -0,0 +1,29 @@
+# cython: language_level=3, boundscheck=False, wraparound=False
+"""
+代码扫描的热点循环的 Cython 实现
+
+构建: cythonize -i app/core/_scan.pyx
+未编译时 code_analyzer 会自动回退到等价的纯 Python 实现
+"""
+
+
+cpdef int find_end(int[:] indents, int start, int func_indent, unsigned char[:] comment_mask, int n):
+    """
+    从 start 行（从 0 开始计数）向后查找函数的结束位置
+    
+    Args:
+        indents: 每一行的缩进宽度
+        start: 开始查找的行下标
+        func_indent: 函数定义行的缩进宽度
+        comment_mask: 注释行标记，注释行为 1
+        n: 总行数
+    
+    Returns:
+        第一个缩进不大于 func_indent 的非空、非注释行的下标，未找到时返回 n
+    """
+    cdef int i, line_indent
+    for i in range(start, n):
+        line_indent = indents[i]
+        if 0 < line_indent <= func_indent and not comment_mask[i]:
+            return i
+    return n
@@ -1,157 +1,604 @@
+import heapq
+import multiprocessing
 import os
+import threading
 import re
-from typing import List, Dict, Any
+import zipfile
+from array import array
+from bisect import bisect_right
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from dataclasses import dataclass
+from functools import cached_property, lru_cache
+from itertools import islice
+from typing import List, Dict, Any, BinaryIO, Iterable, Iterator, Optional, Set, Tuple, Union
 import logging
 
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+# 编译后的 Cython 扩展（app/core/_scan.pyx），未编译时使用纯 Python 实现
+try:
+    from app.core._scan import find_end as _find_end_native
+except ImportError:
+    _find_end_native = None
+
+# 可选的解压加速：用 python-isal 替换 zipfile 内部使用的 zlib，加速读取ZIP成员时的 DEFLATE 解压
+try:
+    from isal import isal_zlib
+    zipfile.zlib = isal_zlib
+except ImportError:
+    pass
+
 logger = logging.getLogger(__name__)
 
+# 各语言的函数定义正则，模块加载时编译一次，避免逐行查找 re 模块缓存。
+# 以 MULTILINE 模式对整个文件做一次 finditer，因此空白用 [^\S\n] 表示，
+# 保证每次匹配都不会跨越行边界，与逐行匹配的结果一致
+_PY_FUNC_PATTERN = re.compile(r'^[^\S\n]*def[^\S\n]+(\w+)[^\S\n]*\(([^)\n]*)\)[^\S\n]*:', re.MULTILINE)
+_JS_FUNC_PATTERN = re.compile(
+    r'^(?:export[^\S\n]+)?(?:async[^\S\n]+)?function[^\S\n]+(\w+)[^\S\n]*\(([^)\n]*)\)'
+    r'|^[^\S\n]*(?:const|let|var)[^\S\n]+(\w+)[^\S\n]*=[^\S\n]*(?:async[^\S\n]+)?\([^\S\n]*([^)\n]*)[^\S\n]*\)[^\S\n]*=>',
+    re.MULTILINE
+)
+_JAVA_FUNC_PATTERN = re.compile(
+    r'^(?:public|private|protected|static|final|abstract)[^\S\n]*(?:\w+[^\S\n]+)*[^\S\n]+(\w+)[^\S\n]*\(([^)\n]*)\)',
+    re.MULTILINE
+)
+_CPP_FUNC_PATTERN = re.compile(r'^(?:\w+[^\S\n]+)*(?:\*|\&)?[^\S\n]*(\w+)[^\S\n]*\(([^)\n]*)\)', re.MULTILINE)
+
+_FUNC_PATTERNS = {
+    '.py': _PY_FUNC_PATTERN,
+    '.js': _JS_FUNC_PATTERN,
+    '.ts': _JS_FUNC_PATTERN,
+    '.tsx': _JS_FUNC_PATTERN,
+    '.jsx': _JS_FUNC_PATTERN,
+    '.java': _JAVA_FUNC_PATTERN,
+    '.cs': _JAVA_FUNC_PATTERN,
+    '.cpp': _CPP_FUNC_PATTERN,
+}
+
+# 注释行正则，用于判断函数结束位置时跳过注释；与函数定义正则一样对整个文件做一次 finditer
+_C_COMMENT_PATTERN = re.compile(r'^[^\S\n]*(?://|/\*|\*/)', re.MULTILINE)
+_COMMENT_PATTERNS = {
+    '.py': re.compile(r'^[^\S\n]*#', re.MULTILINE),
+    '.js': _C_COMMENT_PATTERN,
+    '.ts': _C_COMMENT_PATTERN,
+    '.tsx': _C_COMMENT_PATTERN,
+    '.jsx': _C_COMMENT_PATTERN,
+    '.java': _C_COMMENT_PATTERN,
+    '.cpp': _C_COMMENT_PATTERN,
+    '.cs': _C_COMMENT_PATTERN,
+}
+
+# 每行的行首空白（空白行连同其换行符一起计入缩进，与逐行 readlines() 时的行为一致）
+_INDENT_RE = re.compile(r'^[^\S\n]*\n?', re.MULTILINE)
+
+_JS_EXTS = ('.js', '.ts', '.tsx', '.jsx')
+_SOURCE_EXTS = ('.js', '.ts', '.tsx', '.jsx', '.py', '.java', '.cpp', '.cs')
+
+# 各语言的源文件扩展名，以及扩展名到语言的反查表
+_LANG_EXTS = {
+    'nodejs': _JS_EXTS,
+    'python': ('.py',),
+    'java': ('.java',),
+    'dotnet': ('.cs',),
+    'cpp': ('.cpp',),
+}
+_EXT_LANG = {ext: lang for lang, exts in _LANG_EXTS.items() for ext in exts}
+# 某种语言的源文件占比达到该比例时视为单一语言项目，只分析该语言的源文件；否则分析全部源文件
+_DOMINANT_LANG_RATIO = 0.95
+
+# 需求描述的分句正则与功能点的中英文关键词正则
+_SENT_SPLIT = re.compile(r'[。；;]')
+_ZH_WORDS = re.compile(r'[\u4e00-\u9fa5]+')
+_EN_WORDS = re.compile(r'[a-zA-Z_]+')
+
+# 每个功能点最多返回的实现位置数量，可通过环境变量 MAX_MATCHES_PER_FEATURE 配置，不大于 0 表示不限制
+DEFAULT_MAX_MATCHES_PER_FEATURE = int(os.getenv("MAX_MATCHES_PER_FEATURE", "50"))
+
+# 超过该大小（字节）的源文件（多为生成或压缩后的代码）不做分析，可通过环境变量 MAX_SOURCE_FILE_SIZE 配置
+MAX_SOURCE_FILE_SIZE = int(os.getenv("MAX_SOURCE_FILE_SIZE", "1048576"))
+
+# 文件数达到该阈值时才启用多进程扫描，小项目串行处理以省去进程启动开销
+_PARALLEL_MIN_FILES = 32
+# 并行扫描的最大进程数
+_SCAN_MAX_WORKERS = min(8, os.cpu_count() or 1)
+# 并行扫描时每批提交给进程池的最大文件数，以及每批读入内存的ZIP成员内容的总字节数上限
+_SCAN_BATCH_FILES = 256
+_SCAN_BATCH_BYTES = 64 * 1024 * 1024
+
+# 所有分析器共用的扫描进程池，首次并行扫描时创建；
+# 服务进程是多线程的，使用 forkserver（不支持时用 spawn）启动工作进程，避免直接 fork 服务进程
+_scan_executor: Optional[ProcessPoolExecutor] = None
+_scan_executor_lock = threading.Lock()
+
+
+def _get_scan_executor() -> ProcessPoolExecutor:
+    """返回共用的扫描进程池，不存在时创建"""
+    global _scan_executor
+    with _scan_executor_lock:
+        if _scan_executor is None:
+            start_method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+            _scan_executor = ProcessPoolExecutor(
+                max_workers=_SCAN_MAX_WORKERS,
+                mp_context=multiprocessing.get_context(start_method)
+            )
+        return _scan_executor
+
+
+def _discard_scan_executor(executor: ProcessPoolExecutor) -> None:
+    """丢弃已损坏的扫描进程池，下次并行扫描时重新创建"""
+    global _scan_executor
+    with _scan_executor_lock:
+        if _scan_executor is executor:
+            _scan_executor = None
+    executor.shutdown(wait=False)
+
+
+def _compute_line_starts(text: str) -> array:
+    """计算每一行在文本中的起始偏移，行的划分与 readlines() 保持一致"""
+    line_starts = array('i', [0] if text else [])
+    text_len = len(text)
+    pos = text.find('\n')
+    while pos != -1 and pos + 1 < text_len:
+        line_starts.append(pos + 1)
+        pos = text.find('\n', pos + 1)
+    return line_starts
+
+
+def _compute_indents(text: str, line_count: int) -> array:
+    """一次性计算每一行的缩进宽度"""
+    # 文本以换行符结尾时，末尾会多出一个空匹配，按行数截断
+    return array('i', islice(map(len, _INDENT_RE.findall(text)), line_count))
+
+
+def _compute_comment_mask(text: str, file_ext: str, line_starts: array) -> bytearray:
+    """标记注释行，注释行对应位置为 1"""
+    comment_mask = bytearray(len(line_starts))
+    comment_pattern = _COMMENT_PATTERNS.get(file_ext)
+    if comment_pattern is not None:
+        for match in comment_pattern.finditer(text):
+            comment_mask[bisect_right(line_starts, match.start()) - 1] = 1
+    return comment_mask
+
+
+def _iter_source_files(directory: str) -> Iterator[str]:
+    """递归遍历目录并产出源代码文件路径，遍历顺序与 os.walk 一致，但直接复用 scandir 的文件类型信息"""
+    sub_dirs = []
+    try:
+        with os.scandir(directory) as entries:
+            for entry in entries:
+                if entry.is_dir():
+                    if not entry.is_symlink():
+                        sub_dirs.append(entry.path)
+                elif entry.name.endswith(_SOURCE_EXTS):
+                    yield entry.path
+    except OSError as e:
+        logger.error(f"扫描目录 {directory} 失败: {e}")
+        return
+    
+    for sub_dir in sub_dirs:
+        yield from _iter_source_files(sub_dir)
+
+
+def _scan_source(rel_path: str, data: bytes) -> Tuple[str, Optional[Dict[str, Dict[str, Any]]]]:
+    """解码单个源文件的内容并提取其中的函数定义
+
+    该函数会被分发到子进程中执行，因此需要定义在模块级别以便序列化
+    """
+    # 一次性解码整个文件，并按文本模式的通用换行规则统一换行符
+    text = data.decode('utf-8', 'ignore')
+    if '\r' in text:
+        text = text.replace('\r\n', '\n').replace('\r', '\n')
+    
+    file_ext = os.path.splitext(rel_path)[1]
+    return rel_path, CodeAnalyzer.extract_functions(text, file_ext, _compute_line_starts(text))
+
+
+def _scan_file(file_path: str, code_dir: str) -> Tuple[str, Optional[Dict[str, Dict[str, Any]]]]:
+    """读取单个源文件并提取其中的函数定义，读取失败时函数表为 None
+
+    该函数会被分发到子进程中执行，因此需要定义在模块级别以便序列化
+    """
+    rel_path = os.path.relpath(file_path, code_dir)
+    try:
+        with open(file_path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size > MAX_SOURCE_FILE_SIZE:
+                logger.warning(f"跳过超过 {MAX_SOURCE_FILE_SIZE} 字节的源文件: {rel_path}")
+                return rel_path, None
+            data = f.read()
+    except Exception as e:
+        logger.error(f"读取文件 {file_path} 失败: {e}")
+        return rel_path, None
+    logger.debug(f"成功读取文件: {rel_path}")
+    return _scan_source(rel_path, data)
+
+
+def _iter_batches(args_iter: Iterator[Tuple], sizes: List[int]) -> Iterator[List[Tuple]]:
+    """
+    按文件数和内容大小把扫描参数分批
+
+    每批最多 _SCAN_BATCH_FILES 个文件，内容总大小不超过 _SCAN_BATCH_BYTES（单个文件超过上限时单独成批）。
+    先根据 sizes 决定是否结束当前批次，再从 args_iter 取下一项，按需读取的内容不会提前读入内存
+    """
+    batch, batch_bytes = [], 0
+    for size in sizes:
+        if batch and (len(batch) >= _SCAN_BATCH_FILES or batch_bytes + size > _SCAN_BATCH_BYTES):
+            yield batch
+            batch, batch_bytes = [], 0
+        batch.append(next(args_iter))
+        batch_bytes += size
+    if batch:
+        yield batch
+
+
+@lru_cache(maxsize=256)
+def _tokenize_feature(feature: str) -> Tuple[Tuple[str, ...], Tuple[str, ...], str]:
+    """提取功能描述中的中文关键词、英文关键词以及描述的小写形式，按功能描述缓存结果"""
+    # 纯 ASCII 的描述不可能包含中文，str.isascii() 只检查字符串的存储类型，无需进入正则引擎
+    zh_words = () if feature.isascii() else tuple(_ZH_WORDS.findall(feature))
+    return zh_words, tuple(_EN_WORDS.findall(feature)), feature.lower()
+
+
+@dataclass(frozen=True)
+class FeatureIndex:
+    """功能点的预处理结果，每个功能点在匹配开始前只计算一次"""
+    feature: str
+    feature_lower: str
+    zh_words: Tuple[str, ...]
+    en_words: Tuple[str, ...]
+    
+    @classmethod
+    def from_feature(cls, feature: str) -> "FeatureIndex":
+        """提取功能描述中的中英文关键词并统一转换为小写"""
+        zh_words, en_words, feature_lower = _tokenize_feature(feature)
+        return cls(
+            feature=feature,
+            feature_lower=feature_lower,
+            zh_words=tuple(word.lower() for word in zh_words),
+            # 过短的英文单词容易误匹配，只保留长度大于 2 的
+            en_words=tuple(word.lower() for word in en_words if len(word) > 2),
+        )
+    
+    @property
+    def keywords(self) -> Tuple[str, ...]:
+        """用于子串匹配的全部关键词：完整描述、中文关键词和英文关键词"""
+        return (self.feature_lower,) + self.zh_words + self.en_words
+
+
+class _SeekableFile:
+    """
+    为文件对象补充 seekable() 方法，其余属性直接转发给原文件对象
+    
+    Python 3.11 之前 SpooledTemporaryFile（上传文件的类型）没有 seekable()，
+    而 zipfile 读取每个成员时都会调用它
+    """
+    
+    def __init__(self, file: BinaryIO):
+        self._file = file
+    
+    def seekable(self) -> bool:
+        return True
+    
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._file, name)
+
+
+def _unique_sorted(values: Iterable[int]) -> Iterator[int]:
+    """去除有序序列中的重复项"""
+    previous = None
+    for value in values:
+        if value != previous:
+            yield value
+            previous = value
+
+
+class _KeywordMatcher:
+    """把所有功能点的关键词合并为一个多模式匹配器，对每个字符串扫描一次即可得到其中出现的关键词
+
+    安装了 pyahocorasick 时使用 Aho-Corasick 自动机，否则逐个关键词做子串匹配
+    """
+    
+    def __init__(self, keywords: Iterable[str]):
+        keywords = set(keywords)
+        # 空关键词（如需求描述为空）是任何字符串的子串，自动机不支持空模式，单独处理
+        self._match_empty = '' in keywords
+        keywords.discard('')
+        self._keywords = tuple(keywords)
+        
+        self._automaton = None
+        if ahocorasick is not None and self._keywords:
+            self._automaton = ahocorasick.Automaton()
+            for keyword in self._keywords:
+                self._automaton.add_word(keyword, keyword)
+            self._automaton.make_automaton()
+    
+    def match(self, text_lower: str) -> Set[str]:
+        """返回出现在给定小写字符串中的关键词集合"""
+        matched = {''} if self._match_empty else set()
+        if self._automaton is not None:
+            matched.update(keyword for _, keyword in self._automaton.iter(text_lower))
+        else:
+            matched.update(keyword for keyword in self._keywords if keyword in text_lower)
+        return matched
+
 
 class CodeAnalyzer:
     """代码分析器类，负责分析代码结构并生成报告"""
     
-    def __init__(self, code_dir: str, problem_description: str):
+    def __init__(self, code_dir: Optional[str], problem_description: str,
+                 zip_file: Optional[Union[str, BinaryIO]] = None,
+                 max_matches_per_feature: int = DEFAULT_MAX_MATCHES_PER_FEATURE):
         """
         初始化代码分析器
         
         Args:
-            code_dir: 代码目录路径
+            code_dir: 代码目录路径，直接读取ZIP文件时为 None
             problem_description: 问题描述文本
+            zip_file: ZIP文件路径或二进制流；提供时直接在内存中读取其中的源文件，不解压到磁盘
+            max_matches_per_feature: 每个功能点最多返回的实现位置数量，不大于 0 表示不限制
+        
+        Raises:
+            zipfile.BadZipFile: 如果ZIP文件无效
         """
         self.code_dir = code_dir
         self.problem_description = problem_description
+        self.max_matches_per_feature = max_matches_per_feature
         self.files_map = {}
-        self._build_files_map()
+        if zip_file is not None:
+            self._build_files_map_from_zip(zip_file)
+        else:
+            self._build_files_map()
+    
+    @classmethod
+    def from_zip(cls, zip_file: Union[str, BinaryIO], problem_description: str,
+                 max_matches_per_feature: int = DEFAULT_MAX_MATCHES_PER_FEATURE) -> "CodeAnalyzer":
+        """
+        直接从ZIP文件创建代码分析器
+        
+        Args:
+            zip_file: ZIP文件路径或二进制流（如上传文件的 SpooledTemporaryFile）
+            problem_description: 问题描述文本
+            max_matches_per_feature: 每个功能点最多返回的实现位置数量，不大于 0 表示不限制
+        
+        Returns:
+            代码分析器实例
+        """
+        return cls(None, problem_description, zip_file=zip_file,
+                   max_matches_per_feature=max_matches_per_feature)
     
     def _build_files_map(self):
-        """构建文件路径到内容的映射"""
+        """从代码目录构建文件路径到函数定义表的映射"""
         logger.info(f"正在构建文件映射，扫描目录: {self.code_dir}")
-        for root, _, files in os.walk(self.code_dir):
-            for file in files:
-                if file.endswith(('.js', '.ts', '.tsx', '.jsx', '.py', '.java', '.cpp', '.cs')):
-                    file_path = os.path.join(root, file)
-                    try:
-                        rel_path = os.path.relpath(file_path, self.code_dir)
-                        with open(file_path, 'r', encoding='utf-8', errors='ignore') as f:
-                            self.files_map[rel_path] = f.readlines()
-                        logger.debug(f"成功读取文件: {rel_path}")
-                    except Exception as e:
-                        logger.error(f"读取文件 {file_path} 失败: {e}")
+        try:
+            self._root_files = set(os.listdir(self.code_dir))
+        except OSError:
+            self._root_files = set()
+        
+        file_paths = self._select_source_files(list(_iter_source_files(self.code_dir)))
+        self._scan_sources(_scan_file, file_paths, [self.code_dir] * len(file_paths))
+    
+    def _build_files_map_from_zip(self, zip_file: Union[str, BinaryIO]):
+        """从ZIP文件构建文件路径到函数定义表的映射，成员内容直接在内存中读取"""
+        logger.info("正在构建文件映射，直接读取ZIP文件")
+        if not isinstance(zip_file, (str, os.PathLike)) and not hasattr(zip_file, 'seekable'):
+            zip_file = _SeekableFile(zip_file)
+        with zipfile.ZipFile(zip_file, 'r') as zip_ref:
+            members = {info.filename: info for info in zip_ref.infolist() if not info.is_dir()}
+            logger.info(f"ZIP文件包含 {len(members)} 个文件")
+            self._root_files = {name for name in members if '/' not in name}
+            
+            names = self._select_source_files([name for name in members if name.endswith(_SOURCE_EXTS)])
+            oversized_count = sum(1 for name in names if members[name].file_size > MAX_SOURCE_FILE_SIZE)
+            if oversized_count:
+                logger.warning(f"跳过 {oversized_count} 个超过 {MAX_SOURCE_FILE_SIZE} 字节的源文件")
+                names = [name for name in names if members[name].file_size <= MAX_SOURCE_FILE_SIZE]
+            
+            # 成员内容在扫描时按需读取，并行扫描时按解压后的大小分批，不会同时全部驻留在内存中
+            contents = (zip_ref.read(members[name]) for name in names)
+            sizes = [members[name].file_size for name in names]
+            self._scan_sources(_scan_source, names, contents, sizes=sizes)
+    
+    def _select_source_files(self, source_paths: List[str]) -> List[str]:
+        """记录源文件的扩展名并检测项目类型，返回需要分析的源文件"""
+        # 记录出现过的扩展名，项目类型检测只需做集合查找；*.test.js 测试文件不作为 Node.js 项目的判定依据
+        self._ext_set = {
+            os.path.splitext(path)[1] for path in source_paths if not path.endswith('.test.js')
+        }
+        
+        # 按语言统计源文件数量，只有一种语言明显占主导时才跳过其他语言的文件；
+        # 多语言项目（如带 Python 脚本的 Java 项目、前后端分离的项目）分析全部源文件
+        lang_counts = Counter(_EXT_LANG.get(os.path.splitext(path)[1]) for path in source_paths)
+        if not lang_counts:
+            return source_paths
+        lang, count = lang_counts.most_common(1)[0]
+        if lang is None or count < len(source_paths) * _DOMINANT_LANG_RATIO:
+            return source_paths
+        
+        active_exts = _LANG_EXTS[lang]
+        selected_paths = [path for path in source_paths if path.endswith(active_exts)]
+        skipped_count = len(source_paths) - len(selected_paths)
+        if skipped_count:
+            logger.info(f"源文件以 {lang} 为主，跳过 {skipped_count} 个其他语言的源文件")
+        return selected_paths
+    
+    def _scan_sources(self, scan_func, paths: List[str], *scan_args: Iterable[Any],
+                      sizes: Optional[List[int]] = None):
+        """
+        对每个源文件执行 scan_func，并把提取到的函数定义表合并到 files_map
+        
+        Args:
+            scan_func: 扫描函数，第一个参数为源文件路径
+            paths: 源文件路径列表
+            scan_args: scan_func 的其余参数，与 paths 一一对应，可以是按需生成的迭代器
+            sizes: 各文件由 scan_args 读入内存的内容大小，用于限制并行扫描每批的内存占用；
+                不传时每批只按文件数限制
+        """
+        args_iter = zip(paths, *scan_args)
+        results = []
+        # 各文件的扫描相互独立，文件较多时分批提交到共用的进程池中并行执行
+        if len(paths) >= _PARALLEL_MIN_FILES:
+            executor = _get_scan_executor()
+            for batch in _iter_batches(args_iter, sizes or [0] * len(paths)):
+                try:
+                    results.extend(list(executor.map(scan_func, *zip(*batch), chunksize=16)))
+                except BrokenProcessPool:
+                    logger.warning("扫描进程池已损坏，改为串行扫描")
+                    _discard_scan_executor(executor)
+                    results.extend(scan_func(*args) for args in batch)
+                    break
+        # 串行扫描（或进程池损坏后剩余的文件）逐个读取和处理
+        results.extend(scan_func(*args) for args in args_iter)
+        
+        for rel_path, functions in results:
+            if functions is not None:
+                self.files_map[rel_path] = functions
         logger.info(f"文件映射构建完成，共读取 {len(self.files_map)} 个文件")
     
-    def extract_functions(self, file_content: List[str], file_ext: str) -> Dict[str, Dict[str, Any]]:
+    @staticmethod
+    def extract_functions(text: str, file_ext: str, line_starts: array) -> Dict[str, Dict[str, Any]]:
         """从文件内容中提取函数定义"""
         functions = {}
         
         # 根据文件类型选择不同的正则表达式
-        if file_ext == '.py':
-            # Python函数定义
-            pattern = r'^\s*def\s+(\w+)\s*\(([^)]*)\)\s*:'
-        elif file_ext in ('.js', '.ts', '.tsx', '.jsx'):
-            # JavaScript/TypeScript函数定义
-            pattern = r'^(?:export\s+)?(?:async\s+)?function\s+(\w+)\s*\(([^)]*)\)|^\s*(?:const|let|var)\s+(\w+)\s*=\s*(?:async\s+)?\(\s*([^)]*)\s*\)\s*=>'
-        elif file_ext in ('.java', '.cs'):
-            # Java/C#方法定义
-            pattern = r'^(?:public|private|protected|static|final|abstract)\s*(?:\w+\s+)*\s+(\w+)\s*\(([^)]*)\)'
-        elif file_ext == '.cpp':
-            # C++函数定义
-            pattern = r'^(?:\w+\s+)*(?:\*|\&)?\s*(\w+)\s*\(([^)]*)\)'
-        else:
+        pattern = _FUNC_PATTERNS.get(file_ext)
+        if pattern is None:
             return functions
         
-        for i, line in enumerate(file_content, 1):
-            match = re.search(pattern, line)
-            if match:
-                # 处理不同语言的捕获组
-                if file_ext in ('.js', '.ts', '.tsx', '.jsx'):
-                    func_name = match.group(1) or match.group(3)
-                    params = match.group(2) or match.group(4) or ''
-                else:
-                    func_name = match.group(1)
-                    params = match.group(2) or ''
-                
-                # 尝试找到函数结束位置
-                end_line = self._find_function_end(file_content, i, file_ext)
-                functions[func_name] = {
-                    'start_line': i,
-                    'end_line': end_line,
-                    'params': params.strip()
-                }
+        # 每行的缩进和是否为注释只计算一次，供查找各函数结束位置时复用
+        indents = _compute_indents(text, len(line_starts))
+        comment_mask = _compute_comment_mask(text, file_ext, line_starts)
+        
+        # 对整个文件执行一次扫描，再把匹配偏移换算为行号
+        for match in pattern.finditer(text):
+            i = bisect_right(line_starts, match.start())
+            
+            # 处理不同语言的捕获组
+            if file_ext in _JS_EXTS:
+                func_name = match.group(1) or match.group(3)
+                params = match.group(2) or match.group(4) or ''
+            else:
+                func_name = match.group(1)
+                params = match.group(2) or ''
+            
+            # 尝试找到函数结束位置
+            end_line = CodeAnalyzer._find_function_end(indents, comment_mask, i)
+            functions[func_name] = {
+                'start_line': i,
+                'end_line': end_line,
+                'params': params.strip()
+            }
         
         return functions
     
-    def _find_function_end(self, file_content: List[str], start_line: int, file_ext: str) -> int:
+    @staticmethod
+    def _find_function_end(indents: array, comment_mask: bytearray, start_line: int) -> int:
         """尝试确定函数的结束行"""
         # 简单实现：找到缩进减少的地方
-        indent_pattern = re.compile(r'^(\s*)')
-        
-        # 尝试获取函数定义行的缩进
-        match = indent_pattern.search(file_content[start_line - 1])
-        if not match:
-            return start_line
+        func_indent = indents[start_line - 1]
+        line_count = len(indents)
+        # 只有缩进大于 0 的行才可能标志函数结束，因此顶层函数总是延伸到文件末尾
+        if func_indent == 0:
+            return line_count
+        if _find_end_native is not None:
+            return _find_end_native(indents, start_line, func_indent, comment_mask, line_count)
         
-        func_indent = len(match.group(1))
-        
-        for i in range(start_line, len(file_content)):
-            match = indent_pattern.search(file_content[i])
-            if match:
-                line_indent = len(match.group(1))
-                # 如果遇到缩进更小且不是空行或注释的行，可能是函数结束
-                if line_indent <= func_indent and line_indent > 0:
-                    # 检查是否是注释行
-                    if file_ext in ('.js', '.ts', '.tsx', '.jsx', '.java', '.cpp', '.cs'):
-                        if re.match(r'\s*(//|/\*|\*/)', file_content[i]):
-                            continue
-                    elif file_ext == '.py':
-                        if re.match(r'\s*#', file_content[i]):
-                            continue
-                    return i
-            # 如果遇到空行，继续检查
-            elif not file_content[i].strip():
-                continue
-            # 如果遇到缩进为0的非空行，可能是函数结束
-            else:
+        # 直接迭代缩进列，只有缩进满足条件时才查注释标记
+        for i, line_indent in enumerate(islice(indents, start_line, None), start_line):
+            # 如果遇到缩进不大于函数定义行且不是空行或注释的行，可能是函数结束
+            if 0 < line_indent <= func_indent and not comment_mask[i]:
                 return i
         
-        return len(file_content)
+        return line_count
     
     def analyze_features(self) -> List[Dict[str, Any]]:
         """分析代码中的功能实现位置"""
         logger.info("开始功能分析")
         
-        # 从需求描述中提取关键功能点
-        features = self._extract_features_from_description()
+        locations, token_index = self._token_index
         analysis_results = []
-        
-        for feature in features:
-            implementation_locations = []
-            
-            # 搜索相关文件和函数
-            for file_path, file_content in self.files_map.items():
-                file_ext = os.path.splitext(file_path)[1]
-                functions = self.extract_functions(file_content, file_ext)
-                
-                # 简单的关键词匹配逻辑
-                for func_name, func_info in functions.items():
-                    # 结合文件名和函数名进行匹配
-                    if self._is_relevant_to_feature(file_path, func_name, feature):
-                        implementation_locations.append({
-                            'file': file_path,
-                            'function': func_name,
-                            'lines': f"{func_info['start_line']}-{func_info['end_line']}"
-                        })
-            
+        for feature_index in self._feature_indexes:
+            implementation_locations = [
+                locations[location_id]
+                for location_id in self._query_token_index(token_index, feature_index.keywords)
+            ]
             analysis_results.append({
-                'feature_description': feature,
+                'feature_description': feature_index.feature,
                 'implementation_location': implementation_locations
             })
-            logger.info(f"功能 '{feature}' 分析完成，找到 {len(implementation_locations)} 个实现位置")
+            logger.info(f"功能 '{feature_index.feature}' 分析完成，找到 {len(implementation_locations)} 个实现位置")
         
         return analysis_results
     
+    @cached_property
+    def _feature_indexes(self) -> List[FeatureIndex]:
+        """从需求描述中提取的功能点及其关键词"""
+        return [FeatureIndex.from_feature(feature) for feature in self._extract_features_from_description()]
+    
+    @cached_property
+    def _token_index(self) -> Tuple[List[Dict[str, str]], Dict[str, List[int]]]:
+        """
+        遍历一次所有函数，建立功能点关键词到实现位置的倒排索引，之后各功能点只需查询索引
+        
+        Returns:
+            (实现位置列表, 关键词 -> 按遍历顺序排列的实现位置下标列表)
+        """
+        locations: List[Dict[str, str]] = []
+        token_index: Dict[str, List[int]] = {}
+        keywords = {
+            keyword for feature_index in self._feature_indexes for keyword in feature_index.keywords
+        }
+        matcher = _KeywordMatcher(keywords)
+        limit = self.max_matches_per_feature
+        # 每个功能点最多取前 limit 个实现位置，而多个有序列表合并后的前 limit 项
+        # 必然来自各列表的前 limit 项，因此每个关键词的列表也只需保留前 limit 项，
+        # 所有关键词都达到上限后提前结束遍历
+        open_keywords = set(keywords)
+        
+        # 文件路径中出现的关键词对该文件中的所有函数都成立
+        # 同名函数（如 __init__、main、get）在不同文件中反复出现，按函数名缓存转小写和匹配的结果
+        func_name_matches: Dict[str, Set[str]] = {}
+        for file_path, functions in self.files_map.items():
+            file_matched = matcher.match(file_path.lower())
+            for func_name, func_info in functions.items():
+                func_matched = func_name_matches.get(func_name)
+                if func_matched is None:
+                    func_matched = func_name_matches[func_name] = matcher.match(func_name.lower())
+                matched = (file_matched | func_matched) & open_keywords
+                if not matched:
+                    continue
+                location_id = len(locations)
+                locations.append({
+                    'file': file_path,
+                    'function': func_name,
+                    'lines': f"{func_info['start_line']}-{func_info['end_line']}"
+                })
+                for keyword in matched:
+                    location_ids = token_index.setdefault(keyword, [])
+                    location_ids.append(location_id)
+                    if len(location_ids) == limit:
+                        open_keywords.discard(keyword)
+                
+                if not open_keywords:
+                    logger.info(f"所有关键词均已找到 {limit} 个实现位置，提前结束索引构建")
+                    return locations, token_index
+        
+        return locations, token_index
+    
+    def _query_token_index(self, token_index: Dict[str, List[int]], keywords: Iterable[str]) -> Iterator[int]:
+        """按遍历顺序合并各关键词命中的实现位置下标，去重并截取到数量上限"""
+        location_ids = _unique_sorted(heapq.merge(*(token_index.get(keyword, ()) for keyword in set(keywords))))
+        limit = self.max_matches_per_feature
+        return islice(location_ids, limit) if limit > 0 else location_ids
+    
     def _extract_features_from_description(self) -> List[str]:
         """从需求描述中提取功能点"""
         # 简化实现：基于标点符号分割句子
-        sentences = [s.strip() for s in re.split(r'[。；;]', self.problem_description) if s.strip()]
+        sentences = [s.strip() for s in _SENT_SPLIT.split(self.problem_description) if s.strip()]
         
         # 过滤出可能描述功能的句子
         feature_keywords = ['实现', '添加', '创建', '支持', '提供', '开发', '设计']
@@ -170,51 +617,15 @@ class CodeAnalyzer:
         logger.info(f"从需求描述中提取了 {len(features)} 个功能点")
         return features
     
-    def _is_relevant_to_feature(self, file_path: str, func_name: str, feature: str) -> bool:
-        """判断文件和函数是否与特定功能相关"""
-        # 简单的关键词匹配
-        # 提取功能中的关键词
-        feature_words = re.findall(r'[\u4e00-\u9fa5]+', feature)  # 提取中文字符
-        
-        # 转换为小写用于比较
-        file_path_lower = file_path.lower()
-        func_name_lower = func_name.lower()
-        feature_lower = feature.lower()
-        
-        # 检查直接匹配
-        if feature_lower in file_path_lower or feature_lower in func_name_lower:
-            return True
-        
-        # 检查功能关键词与文件名或函数名的匹配
-        for word in feature_words:
-            if word.lower() in file_path_lower or word.lower() in func_name_lower:
-                return True
-        
-        # 检查英文关键词匹配
-        english_words = re.findall(r'[a-zA-Z_]+', feature)
-        for word in english_words:
-            if len(word) > 2 and word.lower() in file_path_lower:
-                return True
-            # 对于函数名，检查驼峰命名或下划线命名的匹配
-            if len(word) > 2:
-                # 检查驼峰命名（如createUser可能匹配create或user）
-                if word.lower() in func_name_lower or \
-                   (re.search(r'[A-Z]', func_name) and 
-                    (word.lower() == func_name_lower[:len(word)] or 
-                     word.lower() in re.findall(r'[a-z]+', func_name_lower))):
-                    return True
-        
-        return False
-    
     def suggest_execution_plan(self) -> str:
         """生成执行计划建议"""
         # 检测项目类型并生成相应的执行计划
-        project_type = self._detect_project_type()
+        project_type = self.project_type
         
         if project_type == 'nodejs':
             return "要执行此项目，应首先执行 `npm install` 安装依赖，然后执行 `npm run start` 来启动服务。"
         elif project_type == 'python':
-            if os.path.exists(os.path.join(self.code_dir, 'requirements.txt')):
+            if 'requirements.txt' in self._root_files:
                 return "要执行此项目，应首先执行 `pip install -r requirements.txt` 安装依赖，然后执行 `python main.py` 或相应的启动脚本。"
             else:
                 return "要执行此项目，应执行 `python main.py` 或相应的启动脚本。"
@@ -225,23 +636,27 @@ class CodeAnalyzer:
         else:
             return "请根据项目类型，按照相应的构建和启动流程执行此项目。"
     
+    @cached_property
+    def project_type(self) -> str:
+        """项目类型，首次访问时检测并缓存"""
+        return self._detect_project_type()
+    
     def _detect_project_type(self) -> str:
         """检测项目类型"""
         # 检查关键文件以确定项目类型
-        if any(f.endswith('.js') and not f.endswith('.test.js') for f in self.files_map):
-            if os.path.exists(os.path.join(self.code_dir, 'package.json')):
-                return 'nodejs'
-        if any(f.endswith('.py') for f in self.files_map):
+        if '.js' in self._ext_set and 'package.json' in self._root_files:
+            return 'nodejs'
+        if '.py' in self._ext_set:
             return 'python'
-        if any(f.endswith('.java') for f in self.files_map):
+        if '.java' in self._ext_set:
             return 'java'
-        if any(f.endswith('.cs') for f in self.files_map):
+        if '.cs' in self._ext_set:
             return 'dotnet'
         return 'unknown'
     
     def generate_test_code(self) -> str:
         """生成测试代码"""
-        project_type = self._detect_project_type()
+        project_type = self.project_type
         
         if project_type == 'nodejs':
             return "// 为 Node.js 项目生成的测试代码示例\n" \
@@ -1,4 +1,5 @@
 from fastapi import FastAPI
+from fastapi.responses import ORJSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 import logging
 import os
@@ -25,7 +26,9 @@ app = FastAPI(
     description="接收代码和需求，分析代码功能并生成结构化报告的API服务",
     version="1.0.0",
     docs_url="/docs",
-    redoc_url="/redoc"
+    redoc_url="/redoc",
+    # 使用 orjson 序列化响应，比标准库 json 更快且直接输出 bytes
+    default_response_class=ORJSONResponse
 )
 
 # 配置CORS
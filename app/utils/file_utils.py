@@ -1,12 +1,36 @@
+"""
+文件处理工具函数
+
+分析接口直接在内存中读取上传的ZIP文件，不调用本模块的解压、保存和临时目录函数；
+这些函数作为库 API 保留，供需要把上传文件落盘处理的调用方使用
+"""
+
+import hashlib
+import io
 import os
 import tempfile
 import zipfile
 import shutil
+import stat
 import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 from typing import BinaryIO
 
 logger = logging.getLogger(__name__)
 
+# 保存上传文件和解压ZIP成员时使用的拷贝缓冲区大小
+COPY_BUFFER_SIZE = 1024 * 1024
+# 并行解压ZIP成员的最大线程数
+EXTRACT_MAX_WORKERS = 8
+
+# 可选的解压加速：extract_zip_file 优先使用 hayazip（SIMD 加速的 DEFLATE + 多线程解压），未安装时使用标准库
+try:
+    import hayazip
+    _fast_unzip = hayazip.extract_zip
+except ImportError:
+    _fast_unzip = None
+
 
 def extract_zip_file(zip_file: BinaryIO, output_dir: str) -> None:
     """
@@ -17,22 +41,30 @@ def extract_zip_file(zip_file: BinaryIO, output_dir: str) -> None:
         output_dir: 输出目录路径
     
     Raises:
-        zipfile.BadZipFile: 如果ZIP文件无效
+        zipfile.BadZipFile: 如果ZIP文件无效或包含指向输出目录之外的路径
     """
     logger.info(f"正在解压ZIP文件到目录: {output_dir}")
     
     # 确保输出目录存在
     os.makedirs(output_dir, exist_ok=True)
+    output_root = os.path.realpath(output_dir)
     
     # 解压文件
     try:
         with zipfile.ZipFile(zip_file, 'r') as zip_ref:
-            # 获取所有文件列表
-            file_list = zip_ref.namelist()
-            logger.info(f"ZIP文件包含 {len(file_list)} 个文件")
+            # 获取所有文件列表，并在写入任何文件之前校验全部成员路径
+            members = zip_ref.infolist()
+            logger.info(f"ZIP文件包含 {len(members)} 个文件")
+            targets = [_resolve_member_path(output_root, info) for info in members]
             
-            # 解压所有文件
-            zip_ref.extractall(output_dir)
+            # hayazip 只接受文件路径
+            if _fast_unzip is not None and isinstance(zip_file, (str, os.PathLike)):
+                _fast_unzip(os.fspath(zip_file), output_dir)
+            else:
+                # 解压时 zlib 会释放 GIL，各成员分发到线程池中并行解压
+                max_workers = min(EXTRACT_MAX_WORKERS, os.cpu_count() or 1)
+                with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                    list(executor.map(partial(_extract_member, zip_ref), members, targets))
             logger.info(f"ZIP文件解压完成，输出目录: {output_dir}")
     except zipfile.BadZipFile:
         logger.error("无效的ZIP文件格式")
@@ -42,6 +74,43 @@ def extract_zip_file(zip_file: BinaryIO, output_dir: str) -> None:
         raise
 
 
+def _resolve_member_path(output_root: str, info: zipfile.ZipInfo) -> str:
+    """
+    计算ZIP成员的解压目标路径，并确保其位于输出目录之内
+    
+    Args:
+        output_root: 输出目录的真实路径
+        info: ZIP成员信息
+    
+    Returns:
+        解压目标路径
+    
+    Raises:
+        zipfile.BadZipFile: 如果成员路径指向输出目录之外
+    """
+    target = os.path.realpath(os.path.join(output_root, info.filename))
+    if os.path.commonpath([output_root, target]) != output_root:
+        raise zipfile.BadZipFile(f"ZIP文件包含非法路径: {info.filename}")
+    return target
+
+
+def _extract_member(zip_ref: zipfile.ZipFile, info: zipfile.ZipInfo, target: str) -> None:
+    """
+    解压单个ZIP成员到目标路径
+    
+    Args:
+        zip_ref: 已打开的ZIP文件
+        info: ZIP成员信息
+        target: 解压目标路径
+    """
+    if info.is_dir():
+        os.makedirs(target, exist_ok=True)
+        return
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    with zip_ref.open(info) as source, open(target, "wb") as dest:
+        shutil.copyfileobj(source, dest, COPY_BUFFER_SIZE)
+
+
 def save_uploaded_file(file: BinaryIO, save_path: str) -> None:
     """
     保存上传的文件到指定路径
@@ -57,13 +126,80 @@ def save_uploaded_file(file: BinaryIO, save_path: str) -> None:
     
     try:
         with open(save_path, "wb") as buffer:
-            shutil.copyfileobj(file, buffer)
+            if not _sendfile_copy(file, buffer):
+                shutil.copyfileobj(file, buffer, COPY_BUFFER_SIZE)
         logger.info(f"文件保存成功: {save_path}")
     except Exception as e:
         logger.error(f"保存文件时出错: {e}")
         raise
 
 
+def _sendfile_copy(src: BinaryIO, dst: BinaryIO) -> bool:
+    """
+    尝试通过 os.sendfile 在内核态完成拷贝
+    
+    Args:
+        src: 源文件对象，需对应真实的文件描述符
+        dst: 目标文件对象
+    
+    Returns:
+        是否已完成拷贝；返回 False 时调用方应回退到普通拷贝
+    """
+    # 尚未落盘的 SpooledTemporaryFile 调用 fileno() 会强制把内存中的数据写入磁盘，因此不走该路径；
+    # 已落盘（大文件上传时通常如此）的可以直接使用其底层临时文件的描述符
+    if not hasattr(os, "sendfile") or not getattr(src, "_rolled", True):
+        return False
+    try:
+        src_fd = src.fileno()
+        dst_fd = dst.fileno()
+        src_stat = os.fstat(src_fd)
+        offset = src.tell()
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        return False
+    # 管道、套接字等无法根据文件大小确定拷贝长度
+    if not stat.S_ISREG(src_stat.st_mode):
+        return False
+    start_offset = offset
+    remaining = src_stat.st_size - offset
+    
+    dst.flush()
+    while remaining > 0:
+        try:
+            sent = os.sendfile(dst_fd, src_fd, offset, remaining)
+        except OSError:
+            # 文件系统不支持 sendfile（如 EINVAL、ENOSYS）时，尚未拷贝任何数据则回退到普通拷贝
+            if offset == start_offset:
+                return False
+            raise
+        if sent == 0:
+            # 源文件在拷贝过程中被截断；尚未拷贝任何数据则回退到普通拷贝，否则不能把不完整的拷贝当作成功
+            if offset == start_offset:
+                return False
+            raise OSError(f"sendfile 拷贝提前结束，剩余 {remaining} 字节未拷贝")
+        offset += sent
+        remaining -= sent
+    src.seek(offset)
+    return True
+
+
+def compute_file_sha256(file: BinaryIO) -> str:
+    """
+    分块计算文件内容的 SHA-256，计算完成后将读取位置重置到文件开头
+    
+    Args:
+        file: 文件对象
+    
+    Returns:
+        十六进制表示的摘要
+    """
+    digest = hashlib.sha256()
+    file.seek(0)
+    for chunk in iter(partial(file.read, COPY_BUFFER_SIZE), b""):
+        digest.update(chunk)
+    file.seek(0)
+    return digest.hexdigest()
+
+
 def create_temp_directory() -> str:
     """
     创建临时目录
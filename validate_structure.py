@@ -7,6 +7,8 @@
 import os
 import sys
 import logging
+import tempfile
+import zipfile
 
 # 配置日志
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
@@ -104,6 +106,32 @@ def check_entry_point():
         logger.error(f"✗ 入口文件不存在: {entry_point}")
         return False
 
+def check_zip_analysis():
+    """检查能否直接分析上传的ZIP文件（上传文件为 SpooledTemporaryFile）"""
+    logger.info("开始检查ZIP文件分析...")
+    
+    try:
+        from app.core.code_analyzer import CodeAnalyzer
+        
+        upload = tempfile.SpooledTemporaryFile(max_size=1024 * 1024)
+        with zipfile.ZipFile(upload, 'w') as zip_ref:
+            zip_ref.writestr('requirements.txt', '')
+            zip_ref.writestr('app/login.py', 'def login(user, password):\n    return True\n')
+        upload.seek(0)
+        
+        analyzer = CodeAnalyzer.from_zip(upload, "实现用户 login 功能")
+        locations = analyzer.analyze_features()[0]['implementation_location']
+    except Exception as e:
+        logger.error(f"✗ ZIP文件分析失败: {e}")
+        return False
+    
+    expected = [{'file': 'app/login.py', 'function': 'login', 'lines': '1-2'}]
+    if locations != expected:
+        logger.error(f"✗ ZIP文件分析结果不符合预期: {locations}")
+        return False
+    logger.info("✓ ZIP文件分析检查通过")
+    return True
+
 def main():
     """主验证函数"""
     logger.info("开始验证项目结构...")
@@ -117,7 +145,8 @@ def main():
     checks = [
         ("目录结构", check_directory_structure),
         ("入口文件", check_entry_point),
-        ("模块导入", check_module_imports)
+        ("模块导入", check_module_imports),
+        ("ZIP文件分析", check_zip_analysis)
     ]
     
     for check_name, check_func in checks: